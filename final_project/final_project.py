@@ -9,10 +9,14 @@ number 1 and use the arrow keys. """
 import sys
 import random
 import math
+import argparse
 
 import astar
 import arcade
 
+from quality_governor import QualityGovernor, TARGET_FPS
+from game_math import visible_panels, is_in_view, move_and_bounce
+
 # --- Constants ---
 
 BABY_DUCKS_COUNT = 10
@@ -20,6 +24,21 @@ ROGUE_DUCKS_COUNT = 2
 
 TREE_COUNT = 80
 
+# Stress mode (--stress) is a benchmark for the quality governor.
+# It spawns far more trees and ducks, keeps corridors free of
+# trees so the player can walk around and scroll the view, and
+# rogue ducks don't end the game, so the throttled work (trees in
+# range, off screen rogue ducks, highlights and background) can
+# be measured over a long run.
+STRESS_TREE_COUNT = 1500
+STRESS_BABY_DUCKS_COUNT = 500
+STRESS_ROGUE_DUCKS_COUNT = 300
+# Every this many rows and columns are corridors without trees
+STRESS_CORRIDOR_SPACING = 4
+# In stress mode no trees are placed this many cells around
+# the player, and no rogue ducks one cell further out
+STRESS_CLEAR_RADIUS = 1
+
 # Sprite Scalings
 SPRITE_SCALING_WALL = 0.5
 # SPRITE_SCALING_WALL = 1.0
@@ -37,6 +56,11 @@ SCREEN_HEIGHT = 600
 
 VIEWPORT_MARGIN = 80
 
+# Shown instead of the grass texture when the
+# governor turns the background detail off
+BACKGROUND_COLOR = (79, 121, 66)
+
+
 # Grid size constants
 GRID_ROWS = 16
 GRID_COLS = 16
@@ -86,6 +110,9 @@ def get_sprite_ij(sprite):
     """ Gets the grid row/col of the sprite. """
     return get_ij(sprite.center_x, sprite.center_y)
 
+# Boundaries the rogue ducks bounce off (left, bottom, right, top)
+ROGUE_DUCK_BOUNDS = get_xy(0, 0) + get_xy(GRID_ROWS, GRID_COLS)
+
 
 def draw_grid():
     """ Draws grid lines for reference. """
@@ -100,15 +127,16 @@ def draw_grid():
         
         arcade.draw_line(x0 - hs, y0 - hs, x1 - hs, y1 - hs, (0, 0, 0, 255))
 
-def draw_grass_background():
-    """ Draws grass background """
+def draw_grass_background(texture, view_left, view_bottom):
+    """ Draws the grass background panels that are
+    inside the viewport. """
 
-    # Background image by athile on OpenGameArt.org
-    texture = arcade.load_texture("images/grass_background.png")
-    
-    # Loop through and create 20 panels of grass background images
-    for i in range(4):
-        for j in range(5):
+    # Loop through the (at most 4 of 20) visible panels
+    rows, cols = visible_panels(
+        view_left, view_bottom, SCREEN_WIDTH, SCREEN_HEIGHT, 4, 5
+    )
+    for i in rows:
+        for j in cols:
             arcade.draw_texture_rectangle(
                 (j * SCREEN_WIDTH), (i * SCREEN_HEIGHT),
                 SCREEN_WIDTH, SCREEN_HEIGHT,
@@ -123,6 +151,7 @@ def highlight_sprite(sprite, color=(255, 255, 255, 50)):
         sprite.width, sprite.height, color,
     )
 
+
 class GridAStar(astar.AStar):
     def __init__(self, grid):
         self.grid = grid
@@ -165,38 +194,62 @@ class RogueDuck(arcade.Sprite):
             self.change_x = 1
             self.change_y = -1
 
-    def update(self):
+        # Frame of the last update, for ducks that
+        # are only updated every few frames
+        self.last_update_frame = 0
+
+    def update(self, steps=1):
         """ Updates the rogue duck and allows the
         ducks to move within a boundary and bounce off
-        the boundary. """
-
-        # Call parent update method
-        super().update()
-
-        # Gets the x, y for boundaries
-        x_right, y_top = get_xy(GRID_ROWS, GRID_COLS)
-        x_left, y_bottom = get_xy(0, 0)
+        the boundary. steps is the number of frames
+        to move the duck by. """
+
+        # Move the duck by all the steps at once and change
+        # its direction if it hits the boundary
+        x, y, self.change_x, self.change_y = move_and_bounce(
+            self.center_x, self.center_y,
+            self.change_x, self.change_y, steps,
+            (self.width / 2, self.height / 2), ROGUE_DUCK_BOUNDS,
+        )
 
-        # Change direction of rogue duck if duck hits boundary
-        if self.right >= x_right or self.left <= x_left:
-            self.change_x *= -1
-        elif self.top >= y_top or self.bottom <= y_bottom:
-            self.change_y *= -1
+        # Set both coordinates at once so the sprite
+        # lists are only updated once
+        self.position = (x, y)
 
     
 
 class MyGame(arcade.Window):
     """ Represents the main window of the game."""
 
-    def __init__(self):
-        """ Initializer """
+    def __init__(
+        self, tree_count=TREE_COUNT,
+        baby_ducks_count=BABY_DUCKS_COUNT,
+        rogue_ducks_count=ROGUE_DUCKS_COUNT,
+        stress=False, governor=False, target_fps=TARGET_FPS,
+    ):
+        """ Initializer. In stress mode trees and ducks
+        can share grid cells, so the counts can go past
+        the number of cells. The quality governor only
+        lowers the quality if governor is True, to keep
+        the game at target_fps. """
 
         # Call the parent class initializer
         super().__init__(
             SCREEN_WIDTH, SCREEN_HEIGHT, 
-            "Dutiful Ducks Prototype"
+            "Dutiful Ducks Prototype",
+            update_rate=1 / target_fps,
         )
 
+        # Set up entity counts
+        self.tree_count = tree_count
+        self.baby_ducks_count = baby_ducks_count
+        self.rogue_ducks_count = rogue_ducks_count
+        self.stress = stress
+
+        # Set up the quality governor
+        self.governor = QualityGovernor(target_fps, governor)
+        self.frame_count = 0
+
         # Set up player coordinate and speed
         self.player_coordinate = None
         self.player_speed = 10
@@ -256,6 +309,12 @@ class MyGame(arcade.Window):
             "images/text_gameover.png", 1.5
         )
 
+        # Background image by athile on OpenGameArt.org
+        self.grass_texture = arcade.load_texture(
+            "images/grass_background.png"
+        )
+        arcade.set_background_color(BACKGROUND_COLOR)
+
         # Sound from ZapSplat.com
         self.captured_duck_sound = arcade.load_sound(
             "sounds/duck_sound.mp3"
@@ -280,8 +339,9 @@ class MyGame(arcade.Window):
         self.character_sprites_list = arcade.SpriteList()
         self.available_spaces_list = arcade.SpriteList()
 
-        # Reset the score
+        # Reset the score and frame count
         self.score = 0
+        self.frame_count = 0
 
         # Player image from Kenney.nl
         self.player_sprite = arcade.Sprite(
@@ -293,11 +353,31 @@ class MyGame(arcade.Window):
         self.character_sprites_list.append(self.player_sprite)
 
         # Get list of tree coordinates
-        tree_placement = shuffled_tree_coordinates[:TREE_COUNT]
+        if self.stress:
+            # Start the player in a corridor, keep the cells
+            # around the player and the corridors free and let
+            # several trees share the other coordinates
+            self.player_coordinate = random.choice([
+                (i, j) for i, j in tree_coordinates
+                if i % STRESS_CORRIDOR_SPACING == 0 or
+                j % STRESS_CORRIDOR_SPACING == 0
+            ])
+            tree_placement = random.choices(
+                [
+                    (i, j) for i, j
+                    in self.stress_coordinates(STRESS_CLEAR_RADIUS)
+                    if i % STRESS_CORRIDOR_SPACING and
+                    j % STRESS_CORRIDOR_SPACING
+                ],
+                k=self.tree_count,
+            )
+        else:
+            tree_placement = shuffled_tree_coordinates[:self.tree_count]
         self.tree_placement = tree_placement
 
         # Iterate over tree coordinate list and create
         # instances of trees for each coordinate
+        wall_coords = set()
         for coord in tree_placement:
             tree = arcade.Sprite(
                 "images/treeGreen_small.png", SPRITE_SCALING_TREE,
@@ -310,15 +390,21 @@ class MyGame(arcade.Window):
             tree.center_x = x
             tree.center_y = y
 
-            # Adds trees to wall list and tree_list
-            self.wall_list.append(tree)
+            # Adds trees to wall list and tree_list. Trees
+            # sharing a coordinate in stress mode share one
+            # wall, so the physics engine checks no more
+            # walls than in a normal game.
+            if coord not in wall_coords:
+                wall_coords.add(coord)
+                self.wall_list.append(tree)
             self.tree_list.append(tree)
 
         # Get possible coordinates for player that are
         # not where the trees are
-        self.player_coordinate = random.choice(
-            list(set(tree_coordinates) - set(tree_placement))
-        )
+        if not self.stress:
+            self.player_coordinate = random.choice(
+                list(set(tree_coordinates) - set(tree_placement))
+            )
         x, y = get_xy(*self.player_coordinate)
         
         # Set the player coordiantes to random choice
@@ -337,34 +423,46 @@ class MyGame(arcade.Window):
             self.wall_list.append(wall_sprite)
             self.wall_block_list.append(wall_sprite)
 
-        # Get coordinates of baby ducks from tree coordinates
-        duck_placement = random.sample(tree_placement, BABY_DUCKS_COUNT)
+        # Get the trees the baby ducks sit on
+        duck_placement = random.sample(
+            list(self.tree_list), self.baby_ducks_count
+        )
 
         # Place baby ducks randomly with the same
         # coordinates as trees
-        for i, j in duck_placement:
-            x, y = get_xy(i, j)
+        for tree in duck_placement:
             # Image from Kenney.nl
             baby_duck = arcade.Sprite(
                 "images/baby_duck.png",
                 SPRITE_SCALING_BABY_DUCK,
             )
 
-            baby_duck.center_x = x
-            baby_duck.center_y = y
+            baby_duck.center_x = tree.center_x
+            baby_duck.center_y = tree.center_y
             self.baby_duck_list.append(baby_duck)
         
         # Get possible coordinates for rogue ducks that
         # are not where the player or trees are
-        rogue_duck_coords = list(
-            set(tree_coordinates) - (
-                set(tree_placement) | {self.player_coordinate}
+        if self.stress:
+            # Trees may cover the whole grid, so rogue ducks
+            # only avoid the area around the player and can
+            # share coordinates
+            rogue_duck_coords = self.stress_coordinates(
+                STRESS_CLEAR_RADIUS + 1
+            )
+            rogue_duck_placement = random.choices(
+                rogue_duck_coords, k=self.rogue_ducks_count
+            )
+        else:
+            rogue_duck_coords = list(
+                set(tree_coordinates) - (
+                    set(tree_placement) | {self.player_coordinate}
+                )
+            )
+
+            rogue_duck_placement = random.sample(
+                rogue_duck_coords, self.rogue_ducks_count
             )
-        )
-        
-        rogue_duck_placement = random.sample(
-            rogue_duck_coords, ROGUE_DUCKS_COUNT
-        )
 
         # Image from Kenney.nl
 
@@ -399,20 +497,67 @@ class MyGame(arcade.Window):
             self.grid[i][j] = None
         self.astar = GridAStar(self.grid)
 
+        # Find the closest trees before the first frame
+        self.refresh_trees_in_range()
+
+    def stress_coordinates(self, radius):
+        """ Returns the tree coordinates more than
+        radius cells away from the player. """
+
+        pi, pj = self.player_coordinate
+        return [
+            (i, j) for i, j in tree_coordinates
+            if max(abs(i - pi), abs(j - pj)) > radius
+        ]
+
+    def refresh_trees_in_range(self):
+        """ Finds the trees close enough to climb. """
+
+        self.trees_in_range = [
+            t for t in self.tree_list
+            if arcade.get_distance_between_sprites(self.player_sprite, t) < 100
+        ]
+
+    def update_rogue_ducks(self, offscreen_interval):
+        """ Updates the rogue ducks on the screen every frame
+        and the ones off the screen every offscreen_interval
+        frames, in turns. """
+
+        for index, rogue_duck in enumerate(self.rogue_duck_list):
+            # Check whose turn it is before the on screen check
+            if (index + self.frame_count) % offscreen_interval == 0 or (
+                is_in_view(
+                    rogue_duck.center_x, rogue_duck.center_y,
+                    self.view_left, self.view_bottom,
+                    SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE,
+                )
+            ):
+                # Make up for the skipped frames
+                rogue_duck.update(
+                    self.frame_count - rogue_duck.last_update_frame
+                )
+                rogue_duck.last_update_frame = self.frame_count
+
     def update(self, delta_time):
         """ Contains logic to update sprites and view. """
 
+        # Let the governor pick the quality for this frame
+        self.governor.end_frame(delta_time)
+        self.governor.start()
+        settings = self.governor.settings
+        self.frame_count += 1
+
         # Updates physics engine
         self.physics_engine.update()
 
         # Update Rogue Ducks
-        self.rogue_duck_list.update()
+        self.update_rogue_ducks(settings["offscreen_rogue_interval"])
 
-        # Find the closest trees
-        self.trees_in_range = [
-            t for t in self.tree_list
-            if arcade.get_distance_between_sprites(self.player_sprite, t) < 100
-        ]
+        # Find the closest trees. Keep the list while a
+        # tree is picked so the picked index stays valid.
+        interval = settings["trees_in_range_interval"]
+        if not self.pick_tree_state and self.frame_count % interval == 0:
+            self.refresh_trees_in_range()
 
         # --- Manage Scrolling ---
 
@@ -472,7 +617,7 @@ class MyGame(arcade.Window):
                 arcade.play_sound(self.captured_duck_sound)
 
 
-        if self.score == BABY_DUCKS_COUNT:
+        if self.score == self.baby_ducks_count:
             self.player_speed = 0
             self.game_state = False
             self.game_over.center_x = self.view_left + 400
@@ -480,26 +625,37 @@ class MyGame(arcade.Window):
             self.win = True
 
 
-        # Check if player has collided with rogue duck
-        player_rogue_duck_hit_list = arcade.check_for_collision_with_list(
-            self.player_sprite, self.rogue_duck_list
-        )
+        # Rogue ducks don't end a stress mode run
+        if not self.stress:
+            # Check if player has collided with rogue duck
+            player_rogue_duck_hit_list = (
+                arcade.check_for_collision_with_list(
+                    self.player_sprite, self.rogue_duck_list
+                )
+            )
 
-        # Kill game if player collided with rogue duck
-        if len(player_rogue_duck_hit_list) > 0:
-            self.player_speed = 0
-            self.game_state = False
-            self.game_over.center_x = self.view_left + 400
-            self.game_over.center_y = self.view_bottom + 300
+            # Kill game if player collided with rogue duck
+            if len(player_rogue_duck_hit_list) > 0:
+                self.player_speed = 0
+                self.game_state = False
+                self.game_over.center_x = self.view_left + 400
+                self.game_over.center_y = self.view_bottom + 300
+
+        self.governor.stop()
 
-            
     def on_draw(self):
         """ Draws Everything """
 
+        self.governor.start()
+        settings = self.governor.settings
+
         arcade.start_render()
 
         # Draw the background
-        draw_grass_background()
+        if settings["background"]:
+            draw_grass_background(
+                self.grass_texture, self.view_left, self.view_bottom
+            )
 
         # Draws sprite lists
         self.wall_block_list.draw()
@@ -509,7 +665,7 @@ class MyGame(arcade.Window):
         self.rogue_duck_list.draw()
 
         # Highlight the trees that are within the minimum distance
-        if not self.in_tree_state:
+        if not self.in_tree_state and settings["highlight_trees"]:
             for t in self.trees_in_range:
                 highlight_sprite(t)
 
@@ -517,9 +673,13 @@ class MyGame(arcade.Window):
             picked_tree = self.trees_in_range[self.picked_tree_index]
             highlight_sprite(picked_tree, (255, 0, 0, 50))
 
-        # Draws score beneath player
+        # Draws score beneath player, and the
+        # quality level in stress mode
+        score_text = f"Score: {self.score}"
+        if self.stress:
+            score_text += f"  Quality: {self.governor.level}"
         arcade.draw_text(
-            f"Score: {self.score}", 
+            score_text,
             self.view_left + 10, 
             self.view_bottom + 10, 
             arcade.color.WHITE, 14
@@ -555,6 +715,8 @@ class MyGame(arcade.Window):
         # Draw grid for reference
         # draw_grid()
 
+        self.governor.stop()
+
 
     def on_key_press(self, key, modifiers):
         """ Called whenever a key is pressed. """
@@ -579,6 +741,8 @@ class MyGame(arcade.Window):
             
         if key == arcade.key.SPACE:
             self.pick_tree_state = True
+            # The governor may have skipped the last refreshes
+            self.refresh_trees_in_range()
             if self.trees_in_range:
                 self.picked_tree_index = 0
             self.nearest, distance = arcade.get_closest_sprite(
@@ -661,11 +825,83 @@ class MyGame(arcade.Window):
         
            
 
+def non_negative_int(value):
+    """ Parses a command line count that can't be negative. """
+
+    count = int(value)
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"{value} is negative")
+    return count
+
+
+def positive_int(value):
+    """ Parses a command line number that must be above 0. """
+
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not above 0")
+    return number
+
+
 def main():
     """ Main Function. Creates instance of window class and 
     calls set up function. """
 
-    window = MyGame()
+    parser = argparse.ArgumentParser(description="Dutiful Ducks")
+    parser.add_argument(
+        "--stress", action="store_true",
+        help="benchmark with a very large number of trees and ducks, "
+        "rogue ducks don't end the game",
+    )
+    parser.add_argument(
+        "--governor", action="store_true",
+        help="lower the quality to keep the frame rate "
+        "(always on with --stress)",
+    )
+    parser.add_argument(
+        "--target-fps", type=positive_int, default=TARGET_FPS,
+        help="frame rate the governor keeps, e.g. the refresh rate "
+        "of the display",
+    )
+    parser.add_argument(
+        "--trees", type=non_negative_int, help="number of trees"
+    )
+    parser.add_argument(
+        "--baby-ducks", type=non_negative_int, help="number of baby ducks"
+    )
+    parser.add_argument(
+        "--rogue-ducks", type=non_negative_int, help="number of rogue ducks"
+    )
+    args = parser.parse_args()
+
+    # Stress mode has its own default counts
+    if args.stress:
+        defaults = (
+            STRESS_TREE_COUNT, STRESS_BABY_DUCKS_COUNT,
+            STRESS_ROGUE_DUCKS_COUNT,
+        )
+    else:
+        defaults = (TREE_COUNT, BABY_DUCKS_COUNT, ROGUE_DUCKS_COUNT)
+    tree_count, baby_ducks_count, rogue_ducks_count = (
+        default if count is None else count
+        for count, default in zip(
+            (args.trees, args.baby_ducks, args.rogue_ducks), defaults
+        )
+    )
+
+    # Baby ducks sit on trees and, outside of stress mode,
+    # every tree and rogue duck needs its own grid cell
+    if baby_ducks_count > tree_count:
+        parser.error("there must be at least as many trees as baby ducks")
+    if not args.stress and (
+        tree_count + rogue_ducks_count >= len(tree_coordinates)
+    ):
+        parser.error("too many trees and rogue ducks, try --stress")
+
+    window = MyGame(
+        tree_count, baby_ducks_count, rogue_ducks_count, args.stress,
+        args.stress or args.governor, args.target_fps,
+    )
     window.setup()
     arcade.run()
 
@@ -0,0 +1,54 @@
+""" Math for drawing the background and moving the ducks.
+It doesn't need arcade, so it can be checked without a
+window. """
+
+
+def visible_panels(view_left, view_bottom, width, height, rows, cols):
+    """ Returns the row and column ranges of the background
+    panels inside a view of width by height. Panel (i, j)
+    is width by height big and centered on
+    (j * width, i * height), so at most 2 by 2 can be seen. """
+
+    first_i = max(0, (view_bottom + height // 2) // height)
+    first_j = max(0, (view_left + width // 2) // width)
+
+    return (
+        range(first_i, min(rows, first_i + 2)),
+        range(first_j, min(cols, first_j + 2)),
+    )
+
+
+def is_in_view(x, y, view_left, view_bottom, width, height, margin=0):
+    """ Returns True if the point is inside the view
+    grown by margin on every side. """
+
+    return (
+        view_left - margin <= x <= view_left + width + margin and
+        view_bottom - margin <= y <= view_bottom + height + margin
+    )
+
+
+def move_and_bounce(x, y, change_x, change_y, steps, half_size, bounds):
+    """ Moves a point by steps frames of change_x/change_y
+    and turns it around at the bounds (left, bottom, right,
+    top). half_size is (half width, half height) of the
+    sprite. Returns the new x, y, change_x and change_y. """
+
+    x += change_x * steps
+    y += change_y * steps
+
+    left, bottom, right, top = bounds
+    half_width, half_height = half_size
+
+    # Turn towards the inside so a sprite that moved past the
+    # boundary in several steps doesn't get stuck there
+    if x + half_width >= right:
+        change_x = -abs(change_x)
+    elif x - half_width <= left:
+        change_x = abs(change_x)
+    elif y + half_height >= top:
+        change_y = -abs(change_y)
+    elif y - half_height <= bottom:
+        change_y = abs(change_y)
+
+    return x, y, change_x, change_y
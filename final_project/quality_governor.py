@@ -0,0 +1,177 @@
+""" Quality governor that lowers costly work in the
+game to keep a steady frame rate. It doesn't need
+arcade, so it can be checked without a window. """
+
+import time
+
+# Quality governor constants
+TARGET_FPS = 60
+# Smoothing factor for the frame time averages
+GOVERNOR_SMOOTHING = 0.1
+# Single frames count as at most this many frame budgets,
+# so one hitch can't push the average over the slow limit
+GOVERNOR_MAX_FRAME_RATIO = 2
+# Lower quality when frames take this much longer than the budget
+GOVERNOR_SLOW_RATIO = 1.15
+# Raise quality only when frames are within this much of the
+# budget and the work per frame is below GOVERNOR_FAST_RATIO of it
+GOVERNOR_RAISE_FRAME_RATIO = 1.05
+GOVERNOR_FAST_RATIO = 0.5
+# Frames to ignore while the game starts up
+GOVERNOR_WARMUP_FRAMES = 30
+# Frames the average must stay slow before the quality is lowered
+GOVERNOR_SLOW_FRAMES = 10
+# Frames to wait after any change before deciding again
+GOVERNOR_SETTLE_FRAMES = 30
+# Frames to wait after a change before raising quality. It is
+# doubled whenever a raise has to be undone within
+# GOVERNOR_FAILED_RAISE_FRAMES, and reset once a raise holds.
+GOVERNOR_RAISE_COOLDOWN = 180
+GOVERNOR_FAILED_RAISE_FRAMES = 120
+
+# Quality levels from best to cheapest. The intervals are
+# in frames: how often trees in range are refreshed and how
+# often each rogue duck outside of the screen is updated.
+QUALITY_LEVELS = [
+    {
+        "trees_in_range_interval": 1, "offscreen_rogue_interval": 1,
+        "highlight_trees": True, "background": True,
+    },
+    {
+        "trees_in_range_interval": 2, "offscreen_rogue_interval": 2,
+        "highlight_trees": True, "background": True,
+    },
+    {
+        "trees_in_range_interval": 4, "offscreen_rogue_interval": 4,
+        "highlight_trees": True, "background": True,
+    },
+    {
+        "trees_in_range_interval": 6, "offscreen_rogue_interval": 8,
+        "highlight_trees": False, "background": True,
+    },
+    {
+        "trees_in_range_interval": 8, "offscreen_rogue_interval": 12,
+        "highlight_trees": False, "background": False,
+    },
+]
+
+
+class QualityGovernor:
+    """ Watches the frame time and picks a quality level
+    so the game stays at the target frame rate. A disabled
+    governor stays at the best quality. """
+
+    def __init__(self, target_fps=TARGET_FPS, enabled=True):
+        """ Constructor function """
+
+        self.frame_budget = 1 / target_fps
+        self.enabled = enabled
+        self.level = 0
+
+        # Smoothed time between frames and smoothed
+        # time spent in update/on_draw per frame
+        self.reset_averages()
+
+        # Work time of the frame being measured
+        self.frame_work_time = 0
+        self.start_time = None
+
+        # Frames before the next decision, frames the average
+        # has been slow for and frames since the last change
+        self.cooldown = GOVERNOR_WARMUP_FRAMES
+        self.slow_frames = 0
+        self.frames_since_change = 0
+
+        # Back off raising quality when raises keep failing
+        self.raise_cooldown = GOVERNOR_RAISE_COOLDOWN
+        self.raised = False
+
+    @property
+    def settings(self):
+        """ Returns the settings of the current quality level. """
+        return QUALITY_LEVELS[self.level]
+
+    def reset_averages(self):
+        """ Seeds the averages so that the next decision
+        only uses frames of the current level. """
+
+        self.frame_time = self.frame_budget
+        self.work_time = self.frame_budget * GOVERNOR_FAST_RATIO
+
+    def start(self):
+        """ Starts timing a piece of work of the frame. """
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        """ Stops timing a piece of work of the frame. """
+        if self.start_time is not None:
+            self.frame_work_time += time.perf_counter() - self.start_time
+            self.start_time = None
+
+    def change_level(self, step):
+        """ Moves step levels down (positive) or up (negative)
+        and waits for the new level to settle. """
+
+        self.level += step
+        self.raised = step < 0
+        self.cooldown = GOVERNOR_SETTLE_FRAMES
+        self.slow_frames = 0
+        self.frames_since_change = 0
+        self.reset_averages()
+
+    def end_frame(self, delta_time):
+        """ Records the last frame and changes the
+        quality level if needed. """
+
+        if not self.enabled:
+            self.frame_work_time = 0
+            return
+
+        # Update the averages
+        delta_time = min(
+            delta_time, self.frame_budget * GOVERNOR_MAX_FRAME_RATIO
+        )
+        self.frame_time += GOVERNOR_SMOOTHING * (
+            delta_time - self.frame_time
+        )
+        self.work_time += GOVERNOR_SMOOTHING * (
+            self.frame_work_time - self.work_time
+        )
+        self.frame_work_time = 0
+        self.frames_since_change += 1
+
+        # A raise that held is no longer a failed raise
+        if (
+            self.raised and
+            self.frames_since_change > GOVERNOR_FAILED_RAISE_FRAMES
+        ):
+            self.raised = False
+            self.raise_cooldown = GOVERNOR_RAISE_COOLDOWN
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return
+
+        if self.frame_time > self.frame_budget * GOVERNOR_SLOW_RATIO:
+            self.slow_frames += 1
+        else:
+            self.slow_frames = 0
+
+        # Lower the quality if frames stay too slow, raise it
+        # again once frames are fast and there is plenty of
+        # time left per frame
+        fast_frame = self.frame_budget * GOVERNOR_RAISE_FRAME_RATIO
+        fast_work = self.frame_budget * GOVERNOR_FAST_RATIO
+        if self.slow_frames >= GOVERNOR_SLOW_FRAMES:
+            if self.level < len(QUALITY_LEVELS) - 1:
+                # The last raise failed, wait longer next time
+                if self.raised:
+                    self.raise_cooldown *= 2
+                self.change_level(1)
+        elif (
+            self.level > 0 and
+            self.frames_since_change >= self.raise_cooldown and
+            self.frame_time <= fast_frame and
+            self.work_time < fast_work
+        ):
+            self.change_level(-1)
@@ -0,0 +1,63 @@
+""" Headless checks of the background and duck movement math. """
+
+from game_math import visible_panels, is_in_view, move_and_bounce
+
+BOUNDS = (0, 0, 100, 100)
+HALF_SIZE = (5, 5)
+
+
+def test_visible_panels_at_start():
+    rows, cols = visible_panels(0, 0, 800, 600, 4, 5)
+    assert list(rows) == [0, 1]
+    assert list(cols) == [0, 1]
+
+
+def test_visible_panels_scrolled():
+    # Panel 1 spans 400 to 1200, panel 2 spans 1200 to 2000
+    rows, cols = visible_panels(500, 250, 800, 600, 4, 5)
+    assert list(rows) == [0, 1]
+    assert list(cols) == [1, 2]
+
+
+def test_visible_panels_stay_inside_grid():
+    rows, cols = visible_panels(3500, 2000, 800, 600, 4, 5)
+    assert list(rows) == [3]
+    assert list(cols) == [4]
+
+    rows, cols = visible_panels(-500, -500, 800, 600, 4, 5)
+    assert list(rows) == [0, 1]
+    assert list(cols) == [0, 1]
+
+
+def test_is_in_view():
+    assert is_in_view(400, 300, 0, 0, 800, 600)
+    assert not is_in_view(850, 300, 0, 0, 800, 600)
+    assert is_in_view(850, 300, 0, 0, 800, 600, margin=68)
+    assert not is_in_view(400, -100, 0, 0, 800, 600, margin=68)
+
+
+def test_move_catches_up_skipped_frames():
+    assert move_and_bounce(50, 50, 3, -2, 4, HALF_SIZE, BOUNDS) == (
+        62, 42, 3, -2,
+    )
+
+
+def test_bounce_turns_inside():
+    # Moved past the right boundary: turns left
+    x, y, change_x, change_y = move_and_bounce(
+        90, 50, 3, 1, 4, HALF_SIZE, BOUNDS,
+    )
+    assert (x, change_x, change_y) == (102, -3, 1)
+
+    # Still past the boundary but already turned: keeps going left
+    x, y, change_x, change_y = move_and_bounce(
+        x, y, change_x, change_y, 1, HALF_SIZE, BOUNDS,
+    )
+    assert (x, change_x) == (99, -3)
+
+
+def test_bounce_at_bottom():
+    x, y, change_x, change_y = move_and_bounce(
+        50, 6, 1, -2, 1, HALF_SIZE, BOUNDS,
+    )
+    assert (y, change_x, change_y) == (4, 1, 2)
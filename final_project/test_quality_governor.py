@@ -0,0 +1,117 @@
+""" Headless checks of the quality governor. """
+
+from quality_governor import (
+    QualityGovernor, QUALITY_LEVELS, TARGET_FPS, GOVERNOR_RAISE_COOLDOWN,
+)
+
+LOWEST_LEVEL = len(QUALITY_LEVELS) - 1
+BUDGET = 1 / TARGET_FPS
+
+
+def run_frames(governor, count, frame_time, work_time):
+    """ Feeds the governor count frames of the given
+    frame and work times, returns the levels seen. """
+
+    levels = []
+    for _ in range(count):
+        governor.frame_work_time = work_time
+        governor.end_frame(frame_time)
+        levels.append(governor.level)
+    return levels
+
+
+def level_changes(levels):
+    """ Returns the indexes of the frames where the level changed. """
+
+    return [
+        index for index in range(1, len(levels))
+        if levels[index] != levels[index - 1]
+    ]
+
+
+def test_slow_frames_lower_quality_and_stay_low():
+    governor = QualityGovernor()
+
+    # Frames stay slow even though little work is timed,
+    # so the quality must not go back up
+    levels = run_frames(governor, 2000, 0.033, 0.004)
+
+    assert levels[-1] == LOWEST_LEVEL
+    first_lowest = levels.index(LOWEST_LEVEL)
+    assert set(levels[first_lowest:]) == {LOWEST_LEVEL}
+
+
+def test_fast_frames_raise_quality_again():
+    governor = QualityGovernor()
+    run_frames(governor, 1000, 0.033, 0.030)
+    assert governor.level == LOWEST_LEVEL
+
+    run_frames(governor, 2000, BUDGET, 0.004)
+    assert governor.level == 0
+
+
+def test_disabled_governor_keeps_best_quality():
+    governor = QualityGovernor(enabled=False)
+    run_frames(governor, 1000, 0.033, 0.030)
+    assert governor.level == 0
+
+
+def test_long_first_frame_keeps_best_quality():
+    governor = QualityGovernor()
+    governor.end_frame(0.5)
+    levels = run_frames(governor, 300, BUDGET, 0.004)
+    assert set(levels) == {0}
+
+
+def test_single_hitch_keeps_best_quality():
+    governor = QualityGovernor()
+    levels = run_frames(governor, 300, BUDGET, 0.004)
+    levels += run_frames(governor, 1, 0.050, 0.004)
+    levels += run_frames(governor, 300, BUDGET, 0.004)
+    assert set(levels) == {0}
+
+
+def test_lower_target_fps_is_not_slow():
+    governor = QualityGovernor(target_fps=50)
+    levels = run_frames(governor, 2000, 1 / 50, 0.004)
+    assert set(levels) == {0}
+
+
+def test_failed_raises_back_off():
+    # Level 0 is too slow for this machine, level 1 is fine
+    governor = QualityGovernor()
+    levels = []
+    for _ in range(12000):
+        if governor.level == 0:
+            levels += run_frames(governor, 1, 0.025, 0.020)
+        else:
+            levels += run_frames(governor, 1, BUDGET, 0.007)
+
+    changes = level_changes(levels)
+    raises = [index for index in changes if levels[index] == 0]
+
+    # Each failed raise waits about twice as long as the
+    # last one, so the level settles at 1
+    gaps = [second - first for first, second in zip(raises, raises[1:])]
+    for first, second in zip(gaps, gaps[1:]):
+        assert second > 1.5 * first
+    assert len([index for index in changes if index >= 6000]) <= 2
+    assert levels.count(1) > 0.95 * len(levels)
+
+
+def test_raise_that_holds_resets_back_off():
+    governor = QualityGovernor()
+    run_frames(governor, 1000, 0.033, 0.030)
+
+    # A raise that is undone right away doubles the wait
+    level = governor.level
+    while governor.level == level:
+        run_frames(governor, 1, BUDGET, 0.004)
+    run_frames(governor, 100, 0.033, 0.030)
+    assert governor.level == level
+    assert governor.raise_cooldown == 2 * GOVERNOR_RAISE_COOLDOWN
+
+    # A raise that holds brings it back
+    run_frames(governor, 3000, BUDGET, 0.004)
+    assert governor.level == 0
+    assert governor.raise_cooldown == GOVERNOR_RAISE_COOLDOWN